@@ -1,15 +1,90 @@
 import os
+import subprocess
 import numpy as np
-import librosa
 import soundfile as sf
+import soxr
+import numba
+from numba import njit, prange
 from typing import Dict, List, Tuple, Optional, Set
 from pathlib import Path
 from tqdm import tqdm
-from moviepy.video.io.VideoFileClip import VideoFileClip
 import datetime
+import uuid
+import xxhash
+from functools import lru_cache
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+
+
+@lru_cache(maxsize=None)
+def file_fingerprint(file_path: str) -> str:
+    """
+    Cheap content fingerprint of a file: its size plus an xxh3 hash of the first
+    and last 64 KiB, so renamed or moved files are still recognized
+    """
+    size = os.stat(file_path).st_size
+    h = xxhash.xxh3_64()
+    with open(file_path, "rb") as f:
+        h.update(f.read(65536))
+        f.seek(-min(65536, size), os.SEEK_END)
+        h.update(f.read())
+    return f"{size}:{h.hexdigest()}"
+
+
+def _to_mono(audio: np.ndarray) -> np.ndarray:
+    """Downmix a (frames, channels) array to mono float32"""
+    if audio.ndim == 1:
+        return audio
+    if audio.shape[1] == 2:
+        # Fused stereo downmix into a single output buffer
+        mono = np.empty(audio.shape[0], dtype=np.float32)
+        np.add(audio[:, 0], audio[:, 1], out=mono)
+        mono *= 0.5
+        return mono
+    return audio.mean(axis=1, dtype=np.float32)
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _find_segments(
+    audio: np.ndarray, target_samples: int, gap_samples: int, min_mean_square: float
+) -> np.ndarray:
+    """
+    Find the segments with sufficient energy
+
+    Segments start every target_samples + gap_samples samples. Requires
+    len(audio) >= target_samples.
+
+    Returns:
+        Indices of the segments whose mean square energy is at least min_mean_square
+    """
+    step = target_samples + gap_samples
+    n_segments = 1 + (len(audio) - target_samples) // step
+    keep = np.empty(n_segments, np.bool_)
+    for i in prange(n_segments):
+        start = i * step
+        acc = 0.0
+        for j in range(target_samples):
+            acc += audio[start + j] * audio[start + j]
+        keep[i] = acc / target_samples >= min_mean_square
+    return np.nonzero(keep)[0]
 
 
 class AudioDataProcessor:
+    """
+    Builds calibration and evaluation segments from raw audio files
+
+    All audio arrays are kept as mono float32, C-contiguous, from loading through
+    segmentation. The only downcast is the int16 quantization when segments are
+    written.
+    """
+
+    # Minimum mean square energy for a segment to be kept (RMS threshold of 0.01)
+    MIN_MEAN_SQUARE = 0.01**2
+
     def __init__(
         self,
         target_sr: int = 44100,
@@ -18,6 +93,7 @@ class AudioDataProcessor:
         eval_samples: int = 1000,
         gap_duration: float = 2.0,
         previously_processed_files: Set[str] = set(),
+        num_workers: Optional[int] = None,
     ):  # New parameter for gap between samples
         """
         Initialize the audio data processor with sequential sampling
@@ -28,10 +104,14 @@ class AudioDataProcessor:
             calibration_samples: Number of samples for calibration set
             eval_samples: Number of samples for evaluation set
             gap_duration: Gap between consecutive samples in seconds
+            previously_processed_files: Filenames or file fingerprints processed by
+                previous runs, skipped
+            num_workers: Number of worker processes (defaults to the CPU count)
         """
         self.target_sr = target_sr
         self.target_duration = target_duration
         self.target_samples = int(target_sr * target_duration)
+        self.gap_duration = gap_duration
         self.gap_samples = int(target_sr * gap_duration)
         self.calibration_samples = calibration_samples
         self.eval_samples = eval_samples
@@ -42,32 +122,129 @@ class AudioDataProcessor:
         # Set of already processed audio files. For when we want to skip files that have already been processed from previous runs of this script.
         self.previously_processed_files = previously_processed_files
 
-    def load_audio_file(self, file_path: str) -> Tuple[Optional[np.ndarray], int]:
-        """Load audio from various file formats including MP4"""
+        self.num_workers = num_workers
+
+    def load_audio_file(
+        self,
+        file_path: str,
+        max_duration: Optional[float] = None,
+        skip_silent: bool = False,
+    ) -> Tuple[Optional[np.ndarray], int]:
+        """
+        Load audio from various file formats including MP4
+
+        Args:
+            file_path: Path to audio file
+            max_duration: Only decode up to this many seconds from the start of the file
+            skip_silent: If the file needs resampling, first check the decoded audio
+                with is_silent and return no audio if it cannot yield any segment
+
+        Returns:
+            Tuple of (mono float32 audio, sr), or (None, 0) if there is no audio
+        """
         try:
             file_ext = Path(file_path).suffix.lower()
 
             if file_ext == ".mp4":
-                with VideoFileClip(file_path) as video:
-                    if video.audio is None:
+                # Decode only the audio stream, downmixed to mono float32 at the target rate
+                command = [
+                    "ffmpeg",
+                    "-nostdin",
+                    "-loglevel",
+                    "error",
+                    "-i",
+                    file_path,
+                    "-vn",
+                    "-f",
+                    "f32le",
+                    "-ac",
+                    "1",
+                    "-ar",
+                    str(self.target_sr),
+                ]
+                if max_duration is not None:
+                    command += ["-t", str(max_duration)]
+                command.append("-")
+                proc = subprocess.run(
+                    command,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                )
+                if proc.returncode != 0:
+                    error = proc.stderr.decode(errors="replace").strip()
+                    # With -vn and no audio track, ffmpeg has nothing to write
+                    if "does not contain any stream" in error:
                         print(f"No audio stream in {file_path}")
                         return None, 0
-                    # Extract audio at target sample rate
-                    audio_array = video.audio.to_soundarray(fps=self.target_sr)
-                    # Convert stereo to mono if necessary
-                    if len(audio_array.shape) > 1:
-                        audio_array = np.mean(audio_array, axis=1)
-                    return audio_array, self.target_sr
+                    raise RuntimeError(error)
+                return np.frombuffer(proc.stdout, dtype=np.float32), self.target_sr
             else:
-                # Use librosa for other audio formats
-                return librosa.load(file_path, sr=self.target_sr)
+                try:
+                    # Read raw PCM with libsndfile (wav/flac, and mp3 for libsndfile >= 1.1)
+                    with sf.SoundFile(file_path) as sfh:
+                        sr = sfh.samplerate
+                        frames = -1 if max_duration is None else int(max_duration * sr)
+                        audio_array = sfh.read(frames, dtype="float32")
+                except sf.LibsndfileError:
+                    # Last resort: fall back to librosa's audioread backend, imported
+                    # lazily so numba is not loaded on worker startup
+                    import librosa
+
+                    return librosa.load(
+                        file_path,
+                        sr=self.target_sr,
+                        duration=max_duration,
+                        dtype=np.float32,
+                    )
+
+                # Convert stereo to mono if necessary
+                audio_array = _to_mono(audio_array)
+
+                # Resample only when the source rate differs from the target. That is
+                # the expensive step, so first skip files that are silent anyway.
+                if sr != self.target_sr:
+                    if skip_silent and self.is_silent(audio_array, sr):
+                        print(f"Skipping {file_path}: insufficient energy")
+                        return None, 0
+                    audio_array = soxr.resample(audio_array, sr, self.target_sr, "HQ")
+                return audio_array, self.target_sr
 
         except Exception as e:
             print(f"Error loading {file_path}: {e}")
             raise e
 
+    def is_silent(self, audio: np.ndarray, sr: int) -> bool:
+        """
+        Check whether decoded mono audio is a short clip with too little energy
+
+        Runs on the audio at its native rate, so it can be called before resampling.
+        Only clips that will still be shorter than the target duration after
+        resampling are checked, since they are gated on their raw mean square
+        energy, which resampling barely changes. Longer files are gated after DC
+        removal and peak normalization, and resampling can move their peak, so they
+        are never rejected here.
+
+        Args:
+            audio: Mono audio at its native sampling rate
+            sr: Sampling rate of audio
+
+        Returns:
+            True if the audio cannot produce a segment, False if it may
+        """
+        n = len(audio)
+        if n == 0:
+            return True
+
+        # Leave a sample of headroom for the resampler rounding the output length
+        if n * self.target_sr >= (self.target_samples - 1) * sr:
+            return False
+
+        # Half the threshold, as margin for the resampler's filter changing the energy
+        audio = audio.astype(np.float64)
+        return np.dot(audio, audio) / n < 0.5 * self.MIN_MEAN_SQUARE
+
     def load_and_process_audio(
-        self, file_path: str, set_type: str
+        self, file_path: str, set_type: str, max_segments: Optional[int] = None
     ) -> List[Tuple[Optional[np.ndarray], int]]:
         """
         Load and process audio file with sequential sampling
@@ -75,47 +252,56 @@ class AudioDataProcessor:
         Args:
             file_path: Path to audio file
             set_type: Either 'calibration' or 'evaluation'
+            max_segments: Most segments that can be used from this file, used to limit
+                how much of the file is decoded
 
         Returns:
             List of (processed_audio, sr) tuples or empty list if processing fails
         """
         try:
-            # Load audio
-            audio, sr = self.load_audio_file(file_path)
+            # Only decode as much audio as max_segments segments can use
+            max_duration = None
+            if max_segments is not None:
+                max_duration = (
+                    max_segments * (self.target_duration + self.gap_duration)
+                    + self.target_duration
+                )
+
+            # Load audio, skipping the resample of files that are silent anyway
+            audio, sr = self.load_audio_file(file_path, max_duration, skip_silent=True)
 
             if audio is None:
                 return []
 
+            # Writable float32 C-contiguous buffer for the in-place processing below;
+            # only copies if a loader returned something else
+            audio = np.require(audio, dtype=np.float32, requirements=["C", "W"])
+
+            # Bind constants to locals once for the per-segment work below
+            target_samples = self.target_samples
+            gap_samples = self.gap_samples
+            min_mean_square = self.MIN_MEAN_SQUARE
+
             # If audio is shorter than target duration, use entire clip
-            if len(audio) < self.target_samples:
-                # Calculate RMS energy to check if segment has sufficient content
-                energy = np.sqrt(np.mean(audio**2))
-                if energy >= 0.01:  # Same energy threshold as other segments
+            if len(audio) < target_samples:
+                # Calculate mean square energy to check if segment has sufficient content
+                energy = np.dot(audio, audio) / len(audio)
+                if energy >= min_mean_square:  # Same threshold as other segments
                     return [(audio, sr)]
                 else:
                     print(f"Skipping {file_path}: insufficient energy in short clip")
                     return []
 
-            # Basic preprocessing
-            audio = librosa.util.normalize(audio)
-            audio = audio - np.mean(audio)  # Remove DC offset
-
-            segments = []
-            current_pos = 0
-
-            while current_pos + self.target_samples <= len(audio):
-                # Extract segment
-                segment = audio[current_pos : current_pos + self.target_samples]
-
-                # Calculate RMS energy
-                energy = np.sqrt(np.mean(segment**2))
-
-                # Only keep segments with sufficient energy
-                if energy >= 0.01:  # You can adjust this threshold
-                    segments.append((segment, sr))
+            # Basic preprocessing, in place
+            audio -= audio.mean(dtype=np.float64)  # Remove DC offset
+            peak = np.abs(audio).max()
+            if peak > 0:
+                audio *= 1.0 / peak  # Peak normalize
 
-                # Move to next position (add gap)
-                current_pos += self.target_samples + self.gap_samples
+            # Only keep segments with sufficient energy
+            keep = _find_segments(audio, target_samples, gap_samples, min_mean_square)
+            starts = (keep * (target_samples + gap_samples)).tolist()
+            segments = [(audio[start : start + target_samples], sr) for start in starts]
 
             return segments
 
@@ -128,7 +314,6 @@ class AudioDataProcessor:
     ) -> Dict[str, List[str]]:
         """Process files for a specific domain and dataset split"""
         processed_files = []
-        processed_count = 0
         target_count = (
             self.calibration_samples if set_type == "calibration" else self.eval_samples
         )
@@ -137,50 +322,130 @@ class AudioDataProcessor:
         out_path = Path(output_dir) / set_type / domain
         out_path.mkdir(parents=True, exist_ok=True)
 
-        # Process files
-        pbar = tqdm(files, desc=f"Processing {domain} files for {set_type}")
-        for file_path in pbar:
-            # Try to process file
-            try:
-                # Get filename
-                filename = os.path.basename(file_path)
-
-                # Skip if already processed from previous runs of this script
-                if filename in self.previously_processed_files:
-                    continue
+        # Skip files processed by older runs of this script, which keyed processed
+        # files by filename. Newer runs key them by fingerprint, which is only
+        # computed for files that are about to be submitted.
+        candidates = [
+            file_path
+            for file_path in files
+            if os.path.basename(file_path) not in self.previously_processed_files
+        ]
+
+        # Keep a bounded number of files in flight so little work is wasted once
+        # the target count is reached
+        max_workers = self.num_workers or os.cpu_count() or 1
+        max_in_flight = 2 * max_workers
+        worker_params = {
+            "target_sr": self.target_sr,
+            "target_duration": self.target_duration,
+            "gap_duration": self.gap_duration,
+        }
 
-                processed_filenames_for_file = []
+        # Process files
+        # The bar's own count already tracks processed files, so skip the postfix and
+        # only redraw every 32 files or half second
+        pbar = tqdm(
+            total=len(candidates),
+            desc=f"Processing {domain} files for {set_type}",
+            miniters=32,
+            mininterval=0.5,
+        )
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(
+                worker_params,
+                max(1, numba.config.NUMBA_NUM_THREADS // max_workers),
+            ),
+        )
+        try:
+            file_iter = iter(candidates)
+            seen = set()
+            pending = {}
+            while True:
+                # Submit more files while the target has not been reached
+                while (
+                    len(pending) < max_in_flight and len(processed_files) < target_count
+                ):
+                    file_path = next(file_iter, None)
+                    if file_path is None:
+                        break
 
-                if len(processed_files) >= target_count:
+                    # Skip files already processed in previous runs of this script
+                    # or in an earlier split of this run, keeping only the first
+                    # copy of each file
+                    try:
+                        fingerprint = file_fingerprint(file_path)
+                    except OSError as e:
+                        print(f"Error reading {file_path}: {str(e)}")
+                        pbar.update()
+                        continue
+                    if (
+                        fingerprint in self.previously_processed_files
+                        or fingerprint in self.processed_files
+                        or fingerprint in seen
+                    ):
+                        pbar.update()
+                        continue
+                    seen.add(fingerprint)
+
+                    future = executor.submit(
+                        _process_one,
+                        file_path,
+                        domain,
+                        set_type,
+                        out_path,
+                        # The split's full target rather than the remaining count,
+                        # so the decoded prefix (and with it normalization and the
+                        # energy gate) does not depend on worker completion order
+                        target_count,
+                    )
+                    pending[future] = (file_path, fingerprint)
+
+                if not pending:
                     break
 
-                if filename in self.processed_files:
-                    continue
-
-                segments = self.load_and_process_audio(file_path, set_type)
-
-                # Save processed segments
-                for i, (segment, sr) in enumerate(segments):
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path, fingerprint = pending.pop(future)
+                    try:
+                        written_files = future.result()
+                    except Exception as e:
+                        print(f"Error processing {file_path}: {str(e)}")
+                        pbar.update()
+                        continue
+
+                    # Target already reached by other files, discard this file's output
                     if len(processed_files) >= target_count:
-                        break
-
-                    processed_filename = f"{domain}_{len(processed_files):04d}.wav"
-                    processed_filenames_for_file.append(processed_filename)
-
-                    output_file = out_path / processed_filename
-                    sf.write(output_file, segment, sr)
-                    processed_files.append(str(output_file))
-
-                self.processed_files[filename] = {
-                    "full_path": str(file_path),
-                    "processed_datetime": datetime.datetime.now().isoformat(),
-                    "processed_filenames": processed_filenames_for_file,
-                }
-            except Exception as e:
-                print(f"Error processing {file_path}: {str(e)}")
-
-            processed_count += 1
-            pbar.set_postfix({"processed": processed_count})
+                        for tmp_file in written_files:
+                            os.remove(tmp_file)
+                        pbar.update()
+                        continue
+
+                    # Move segments to their final sequential names
+                    processed_filenames_for_file = []
+                    for tmp_file in written_files:
+                        if len(processed_files) >= target_count:
+                            os.remove(tmp_file)
+                            continue
+
+                        processed_filename = f"{domain}_{len(processed_files):04d}.wav"
+                        processed_filenames_for_file.append(processed_filename)
+
+                        output_file = out_path / processed_filename
+                        os.replace(tmp_file, output_file)
+                        processed_files.append(str(output_file))
+
+                    self.processed_files[fingerprint] = {
+                        "full_path": str(file_path),
+                        "processed_datetime": datetime.datetime.now().isoformat(),
+                        "processed_filenames": processed_filenames_for_file,
+                    }
+
+                    pbar.update()
+        finally:
+            executor.shutdown(cancel_futures=True)
+            pbar.close()
 
         return {f"{domain}_{set_type}": processed_files}
 
@@ -224,3 +489,83 @@ class AudioDataProcessor:
             dataset_splits.update(split_files)
 
         return dataset_splits
+
+
+# Processor and segment writer threads used by the current worker process, created
+# once by _init_worker
+_worker_processor: Optional[AudioDataProcessor] = None
+_worker_writer: Optional[ThreadPoolExecutor] = None
+
+
+def _init_worker(params: dict, num_threads: int):
+    """Create the per-process AudioDataProcessor and writer used by _process_one"""
+    global _worker_processor, _worker_writer
+    # Share the cores between worker processes instead of oversubscribing them
+    numba.set_num_threads(num_threads)
+    _worker_processor = AudioDataProcessor(**params)
+    # soundfile releases the GIL while writing, so threads are enough to overlap
+    # writes with quantizing the next segments
+    _worker_writer = ThreadPoolExecutor(max_workers=2)
+
+
+def _quantize_pcm16(segment: np.ndarray, out: np.ndarray, scratch: np.ndarray):
+    """Quantize a float segment to 16-bit PCM into out, using scratch as workspace"""
+    np.multiply(segment, 32767.0, out=scratch)
+    np.clip(scratch, -32768, 32767, out=scratch)
+    # Round to nearest; the cast alone would truncate toward zero
+    np.rint(scratch, out=scratch)
+    np.copyto(out, scratch, casting="unsafe")
+
+
+def _process_one(
+    file_path: str, domain: str, set_type: str, out_path: Path, max_segments: int
+) -> List[str]:
+    """
+    Process a single file in a worker process
+
+    Segments are written under unique temporary names; the parent process renames
+    them to their final sequential names.
+
+    Returns:
+        List of written segment paths
+    """
+    segments = _worker_processor.load_and_process_audio(
+        file_path, set_type, max_segments
+    )
+
+    segments = segments[:max_segments]
+    if not segments:
+        return []
+
+    # Quantize into one int16 buffer for the whole file through a single float32
+    # scratch row, instead of allocating temporaries for every segment. All segments
+    # of a file have the same length.
+    n_samples = len(segments[0][0])
+    pcm = np.empty((len(segments), n_samples), dtype=np.int16)
+    scratch = np.empty(n_samples, dtype=np.float32)
+
+    written_files = []
+    write_futures = []
+    try:
+        for i, (segment, sr) in enumerate(segments):
+            _quantize_pcm16(segment, pcm[i], scratch)
+            # Rows are C-contiguous int16, so soundfile writes them without a copy
+            tmp_file = out_path / f"{domain}_tmp_{uuid.uuid4().hex}.wav"
+            written_files.append(str(tmp_file))
+            write_futures.append(
+                _worker_writer.submit(sf.write, tmp_file, pcm[i], sr, subtype="PCM_16")
+            )
+
+        # Segments must be on disk before the parent process renames them
+        for future in write_futures:
+            future.result()
+    except Exception:
+        # The parent never sees these paths, so let the remaining writes finish and
+        # remove every temporary file before re-raising
+        wait(write_futures)
+        for tmp_file in written_files:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+        raise
+
+    return written_files
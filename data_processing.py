@@ -1,23 +1,40 @@
 import os
-from pathlib import Path
 from typing import List
-import json
+import orjson
 from audio_data_processor import AudioDataProcessor
 
 # Load sources from JSON file
-with open("data_sources.json", "r") as f:
-    sources = json.load(f)
+with open("data_sources.json", "rb") as f:
+    sources = orjson.loads(f.read())
 
 ROOT_DIR = "C:/Users/hranw/Dropbox (MIT)/6.5940 Audio Codecs Project/datasets"
 
 
+def write_json(path: str, data) -> None:
+    """
+    Write data as indented JSON, replacing the file atomically so an interrupted
+    run never leaves it truncated
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_path, path)
+
+
 def collect_files(directory: str, extensions: List[str]) -> List[str]:
     """
-    Recursively collect audio files from directory
+    Recursively collect audio files from directory in a single traversal
     """
+    extensions = {ext.lower() for ext in extensions}
     files = []
-    for ext in extensions:
-        files.extend([str(p) for p in Path(directory).rglob(f"*.{ext}")])
+    stack = [directory]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.rpartition(".")[2].lower() in extensions:
+                    files.append(entry.path)
     return files
 
 
@@ -32,6 +49,10 @@ def main():
     MUSIC_DIRS = sources["data_directories"].get("music", [])
     ENV_DIRS = sources["data_directories"].get("environmental", [])
 
+    # Older runs keyed processed_files by basename, so filter those out here. Newer
+    # entries are keyed by content fingerprint and skipped by the processor.
+    processed_keys = frozenset(sources["processed_files"].keys())
+
     # Collect files
     speech_files = []
     for directory in SPEECH_DIRS:
@@ -39,7 +60,7 @@ def main():
             # Only add files that haven't been processed yet
             new_files = collect_files(directory, AUDIO_EXTENSIONS)
             speech_files.extend(
-                [f for f in new_files if f not in sources["processed_files"]]
+                [f for f in new_files if os.path.basename(f) not in processed_keys]
             )
 
     music_files = []
@@ -48,7 +69,7 @@ def main():
             # Only add files that haven't been processed yet
             new_files = collect_files(directory, AUDIO_EXTENSIONS)
             music_files.extend(
-                [f for f in new_files if f not in sources["processed_files"]]
+                [f for f in new_files if os.path.basename(f) not in processed_keys]
             )
 
     env_files = []
@@ -57,11 +78,9 @@ def main():
             # Only add files that haven't been processed yet
             new_files = collect_files(directory, AUDIO_EXTENSIONS)
             env_files.extend(
-                [f for f in new_files if f not in sources["processed_files"]]
+                [f for f in new_files if os.path.basename(f) not in processed_keys]
             )
 
-    previously_processed_files = set(sources["processed_files"].keys())
-
     # Initialize processor with sequential sampling
     processor = AudioDataProcessor(
         target_sr=44100,
@@ -69,7 +88,7 @@ def main():
         calibration_samples=300,
         eval_samples=1000,
         gap_duration=2.0,  # 2 second gap between consecutive samples
-        previously_processed_files=previously_processed_files,
+        previously_processed_files=processed_keys,
     )
 
     # Create dataset splits
@@ -81,8 +100,7 @@ def main():
     )
 
     # Save dataset split information
-    with open(os.path.join(OUTPUT_DIR, "dataset_splits.json"), "w") as f:
-        json.dump(dataset_splits, f, indent=2)
+    write_json(os.path.join(OUTPUT_DIR, "dataset_splits.json"), dataset_splits)
 
     # Print statistics
     print("\nDataset Statistics:")
@@ -93,8 +111,7 @@ def main():
     for filename, file_info in processor.processed_files.items():
         sources["processed_files"][filename] = file_info
 
-    with open("data_sources.json", "w") as f:
-        json.dump(sources, f, indent=2)
+    write_json("data_sources.json", sources)
 
 
 if __name__ == "__main__":
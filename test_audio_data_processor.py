@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+from audio_data_processor import AudioDataProcessor
+
+rng = np.random.default_rng(0)
+
+
+def dc_offset(sr, duration, dc, noise):
+    """Constant offset over low-level noise"""
+    n = int(sr * duration)
+    return dc + noise * rng.standard_normal(n)
+
+
+def click(sr, duration, noise):
+    """A single full-scale click over low-level noise"""
+    audio = noise * rng.standard_normal(int(sr * duration))
+    audio[len(audio) // 2] = 1.0
+    return audio
+
+
+def bursts(sr, duration, noise):
+    """Short loud bursts every two seconds over low-level noise"""
+    audio = noise * rng.standard_normal(int(sr * duration))
+    for start in range(0, len(audio), 2 * sr):
+        audio[start : start + sr // 100] = 0.8 * rng.standard_normal(
+            len(audio[start : start + sr // 100])
+        )
+    return audio
+
+
+CASES = {
+    "dc_0.05_long": (48000, dc_offset(48000, 600.0, 0.05, 1e-3)),
+    "dc_0.3_long": (48000, dc_offset(48000, 600.0, 0.3, 1e-3)),
+    "dc_short_above_threshold": (48000, dc_offset(48000, 5.0, 0.009, 0.005)),
+    "quiet_short": (48000, dc_offset(48000, 5.0, 0.0, 0.005)),
+    "click_96k": (96000, click(96000, 10.5, 0.0095)),
+    "click_short_22k": (22050, click(22050, 4.0, 0.002)),
+    "bursts_96k": (96000, bursts(96000, 30.0, 1e-4)),
+    "silent_long": (48000, np.zeros(48000 * 30)),
+    "silent_short": (16000, np.zeros(16000 * 3)),
+}
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_is_silent_matches_full_processing(tmp_path, name):
+    sr, audio = CASES[name]
+    audio = audio.astype(np.float32)
+    file_path = str(tmp_path / f"{name}.wav")
+    sf.write(file_path, audio, sr, subtype="FLOAT")
+
+    processor = AudioDataProcessor()
+    silent = processor.is_silent(audio, sr)
+    segments = processor.load_and_process_audio(file_path, "calibration")
+
+    # Reference run without the pre-resample check
+    processor.is_silent = lambda audio, sr: False
+    expected = processor.load_and_process_audio(file_path, "calibration")
+
+    if silent:
+        assert len(expected) == 0
+    assert len(segments) == len(expected)